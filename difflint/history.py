@@ -0,0 +1,116 @@
+# Copyright 2015 Endless Mobile, Inc.
+
+import json
+import sys
+
+from .utils import repo_root
+
+HISTORY_FILE = 'difflint-history.json'
+
+# Weight given to the most recent measurement when updating a file's
+# recorded lint duration. The rest comes from the previously recorded value.
+DURATION_SMOOTHING = 0.5
+
+# Duration, in seconds, assumed for a file that has never been linted when
+# no other file has been linted either.
+DEFAULT_DURATION = 0.1
+
+
+def _is_valid_record(record):
+    return (isinstance(record, dict) and
+            isinstance(record.get('duration'), (int, float)) and
+            isinstance(record.get('warnings'), int))
+
+
+class LintHistory(object):
+    """Remember how long each file took to lint and how many warnings it
+    produced, across runs of difflint.
+
+    The history is stored as JSON inside the repository's .git directory so
+    that it is never committed. It has the form:
+
+    {
+        "path/to/file.py": {"duration": 0.25, "warnings": 3}
+    }
+    """
+
+    def __init__(self, records=None):
+        self._records = records if records is not None else {}
+        self._mean_duration = None
+
+    @staticmethod
+    def _get_path():
+        return repo_root() / '.git' / HISTORY_FILE
+
+    @classmethod
+    def load(cls):
+        """Read the history recorded by previous runs.
+
+        Inputs: None
+
+        Output: A LintHistory object. If no history has been recorded yet, or
+                the recorded history cannot be parsed, it will be empty.
+        """
+        try:
+            with cls._get_path().open() as history_file:
+                records = json.load(history_file)
+            if not isinstance(records, dict) or \
+                    not all(_is_valid_record(r) for r in records.values()):
+                raise ValueError('Unexpected lint history format')
+            return cls(records)
+        except FileNotFoundError:
+            return cls()
+        except ValueError:
+            sys.stderr.write('Ignoring unreadable ' + HISTORY_FILE +
+                             '; lint history will be recorded anew.\n')
+            return cls()
+
+    def save(self):
+        """Write the history to disk for use by later runs. Records of files
+        that no longer exist, for example because they were deleted or
+        renamed, are dropped so that the history does not keep growing."""
+        root = repo_root()
+        self._records = {f: r for f, r in self._records.items()
+                         if (root / f).exists()}
+        self._mean_duration = None
+        with self._get_path().open('w') as history_file:
+            json.dump(self._records, history_file, indent=4, sort_keys=True)
+
+    def record(self, filename, duration, warnings):
+        """Record the results of linting a file.
+
+        Inputs:
+            filename: Path of the file that was linted, as a string.
+            duration: Number of seconds it took to lint the file.
+            warnings: Number of warnings the linters reported.
+
+        Output: None
+        """
+        previous = self._records.get(filename)
+        if previous is not None:
+            duration = (DURATION_SMOOTHING * duration +
+                        (1 - DURATION_SMOOTHING) * previous['duration'])
+        self._records[filename] = {'duration': duration,
+                                   'warnings': warnings}
+        self._mean_duration = None
+
+    def estimated_duration(self, filename):
+        """Estimate how many seconds it will take to lint a file.
+
+        Files that have never been linted are assumed to take as long as the
+        average of all files that have been.
+        """
+        if filename in self._records:
+            return self._records[filename]['duration']
+        if not self._records:
+            return DEFAULT_DURATION
+        if self._mean_duration is None:
+            self._mean_duration = (
+                sum(r['duration'] for r in self._records.values()) /
+                len(self._records))
+        return self._mean_duration
+
+    def past_warnings(self, filename):
+        """Return the number of warnings the file had the last time it was
+        linted, or 0 if it has never been linted."""
+        return self._records.get(filename, {}).get('warnings', 0)
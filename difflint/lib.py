@@ -2,17 +2,22 @@ import argparse
 import datetime
 import difflib
 import io
+import math
 import os
 import os.path
 import pathlib
 import re
 import subprocess
 import sys
+import time
 
-from .lint import get_missing_configuration_files, get_missing_linters, lint
+from .history import LintHistory
+from .lint import (get_missing_configuration_files, get_missing_linters,
+                   has_linters, lint)
 from .utils import repo_root
 
 LOG_FILE = 'lintdiff.log'
+UNCHECKED_FILE = 'difflint-unchecked'
 MISSING_FILE_EXIT_CODE = 72  # os.EX_OSFILE is not portable
 
 def lint_list(file_list):
@@ -27,6 +32,73 @@ def lint_list(file_list):
     """
     return {f: lint(f) for f in file_list}
 
+def lint_list_within_budget(file_list, budget, files_needing_baseline,
+                            history):
+    """Lint the files in the list, in order, as long as the time budget
+    allows.
+
+    Files that need a baseline (copied, modified and renamed files) will be
+    linted a second time in their past state once this function returns, so
+    the time spent on them is counted twice against the budget. Files whose
+    estimated cost, according to the history, would exceed the remaining
+    budget are skipped, so that cheaper files further down the list can
+    still be linted.
+
+    Inputs:
+        file_list: A list of filenames containing no duplicates, in the
+            order they should be linted.
+        budget: Number of seconds that may be spent linting; math.inf for
+            no limit.
+        files_needing_baseline: A set of filenames that will also be linted
+            in their past state.
+        history: A LintHistory object in which to record the duration and
+            number of warnings of each file linted.
+
+    Output: A tuple containing first a mapping of filenames to their linted
+            output as a LintOutput object, and second a list of the
+            filenames that were not linted because they did not fit in the
+            budget, in the order they were given.
+    """
+    lint_mapping = {}
+    unchecked_files = []
+    spent = 0.0
+    for filename in file_list:
+        cost_factor = 2 if filename in files_needing_baseline else 1
+        estimate = history.estimated_duration(filename) * cost_factor
+        if spent + estimate > budget:
+            unchecked_files.append(filename)
+            continue
+        start = time.monotonic()
+        lint_output = lint(filename)
+        duration = time.monotonic() - start
+        history.record(filename, duration,
+                       len(lint_output.get_split_output()))
+        lint_mapping[filename] = lint_output
+        spent += duration * cost_factor
+    return (lint_mapping, unchecked_files)
+
+def prioritize_files(file_list, changed_lines, history):
+    """Order files so that the ones most likely to introduce new warnings,
+    relative to how long they take to lint, come first.
+
+    A file's likelihood of regressing is estimated from the number of lines
+    changed in the staged diff and the number of warnings it had the last
+    time it was linted.
+
+    Inputs:
+        file_list: A list of filenames.
+        changed_lines: Dictionary of the form {filename : lines_changed}
+        history: A LintHistory object.
+
+    Output: A new list containing the filenames of file_list, highest
+            priority first.
+    """
+    def priority(filename):
+        risk = ((1 + changed_lines.get(filename, 0)) *
+                (1 + history.past_warnings(filename)))
+        return risk / max(history.estimated_duration(filename), 1e-6)
+    return sorted(file_list, key=priority, reverse=True)
+
 def build_rename_dict():
     """Build a dictonary of the new filenames of renamed files.
 
@@ -55,6 +127,40 @@ def build_rename_dict():
         new_to_old[line_as_list[2]] = line_as_list[1]
     return new_to_old
 
+def build_changed_lines_dict():
+    """Build a dictionary of how many lines changed in each staged file.
+
+    Input: (none)
+    Output: A dictionary of the form {filename : lines_added_and_removed}
+            Renamed files are listed under their new names. Binary files
+            count as having no changed lines.
+    """
+    git_diff_output = subprocess.check_output(['git', 'diff', '--numstat',
+                                               '--staged', '--find-renames',
+                                               '-z'])
+    # Each entry has the format:
+    #
+    # <added>\t<removed>\t<name>\0
+    #
+    # except for renames and copies, which have the format:
+    #
+    # <added>\t<removed>\t\0<old-name>\0<new-name>\0
+    #
+    # <added> and <removed> are '-' for binary files.
+
+    fields = git_diff_output.decode().split('\0')
+    changed_lines = {}
+    index = 0
+    while index < len(fields) and fields[index]:
+        added, removed, filename = fields[index].split('\t', 2)
+        index += 1
+        if not filename:
+            filename = fields[index + 1]
+            index += 2
+        changed_lines[filename] = sum(int(count) for count in (added, removed)
+                                      if count != '-')
+    return changed_lines
+
 def build_file_list(mode_string):
     """Build a list of staged files matching certain diff-filter statuses.
 
@@ -137,20 +243,36 @@ def report_defects_in_new_files(added_mapping, log_output):
         log_output.write(lint_output.output)
     return any_errors_introduced
 
-def finalize_log_output(log_output, any_new_errors):
+def finalize_log_output(log_output, any_new_errors, append=False):
     """Write the log to disk and print a message if there was something in it.
 
     Writes the contents of the log_output to the LOG_FILE and
     prints a notice to stderr if any_new_errors is True. Deletes
     any existing LOG_FILE if any_new_errors is False.
 
+    When append is True, the contents are added to the end of any
+    existing LOG_FILE instead, and it is never deleted. This keeps the
+    errors reported by an earlier run with a time budget when its
+    unchecked files are checked by `difflint --finish`.
+
     Inputs:
         log_output: A StringIO of linting warnings/errors.
         any_new_errors: A boolean indicating whether any
                         errors were introduced.
+        append: (optional) A boolean indicating whether to add to the
+                existing LOG_FILE.
     Outputs: None
     """
-    if not any_new_errors:
+    if append:
+        if any_new_errors:
+            with open(LOG_FILE, 'a') as f:
+                f.write('\n\n\n')
+                f.write(get_log_header())
+                f.write(log_output.getvalue())
+        if os.path.isfile(LOG_FILE):
+            sys.stderr.write('NOTICE: Check ' + LOG_FILE +
+                             ' for linting error details.\n')
+    elif not any_new_errors:
         try:
             os.unlink(LOG_FILE)
         except FileNotFoundError:
@@ -201,6 +323,61 @@ def detect_new_diff_lint_errors(log_output):
             return True
     return False
 
+def read_unchecked_files():
+    """Read the list of files that a previous run with a time budget did
+    not get around to linting. The reverse operation to this function is
+    write_unchecked_files().
+
+    Inputs: None
+
+    Output: A list of filenames. Empty if no files were left unchecked.
+    """
+    unchecked_path = repo_root() / '.git' / UNCHECKED_FILE
+    if not unchecked_path.is_file():
+        return []
+    return unchecked_path.read_text().splitlines()
+
+def write_unchecked_files(unchecked_files):
+    """Record the files that were not linted because the time budget ran
+    out, so that `difflint --finish` can lint them later. Removes any
+    existing record if unchecked_files is empty.
+
+    Input: unchecked_files: A list of filenames.
+
+    Output: None
+    """
+    unchecked_path = repo_root() / '.git' / UNCHECKED_FILE
+    if not unchecked_files:
+        try:
+            unchecked_path.unlink()
+        except FileNotFoundError:
+            pass
+        return
+    unchecked_path.write_text(''.join(f + '\n' for f in unchecked_files))
+
+def report_unchecked_files(unchecked_files, log_output):
+    """Tell the user which files were not linted because the time budget
+    ran out, and how to lint them later.
+
+    Inputs:
+        unchecked_files: A list of filenames.
+        log_output: StringIO object to receive the list as well, so that
+            it is kept alongside any linting warnings/errors. The log is
+            written to disk whenever files were left unchecked, even if
+            the files that were checked are clean.
+
+    Output: None
+    """
+    if not unchecked_files:
+        return
+    report = ('Time budget exhausted; ' + str(len(unchecked_files)) +
+              ' staged file(s) were not checked:\n' +
+              ''.join('    ' + f + '\n' for f in unchecked_files) +
+              'Run `difflint --finish` to check them.\n')
+    sys.stderr.write('NOTICE: ' + report)
+    log_output.write('\n\n\n')
+    log_output.write(report)
+
 def save_merge_state():
     """Saves the merge state in the event that we're resolving a
     merge conflict. Stashing will mangle the merge state unless
@@ -254,12 +431,43 @@ def restore_merge_state(merge_msg, merge_head_commit_hash):
     (dot_git / 'MERGE_HEAD').write_text(merge_head_commit_hash)
     (dot_git / 'MERGE_MSG').write_text(merge_msg + '\n')
 
+def budget_seconds(value):
+    """Parse a time budget given on the command line.
+
+    Input: value: A string.
+
+    Output: The budget in seconds, as a float. Raises
+            argparse.ArgumentTypeError if it is not a finite, non-negative
+            number.
+    """
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('"' + value + '" is not a number ' +
+                                         'of seconds')
+    if not math.isfinite(seconds) or seconds < 0:
+        raise argparse.ArgumentTypeError('the budget must be a finite, ' +
+                                         'non-negative number of seconds, ' +
+                                         'not "' + value + '"')
+    return seconds
+
 def main():
     parser = argparse.ArgumentParser(description='Linter that will examine ' +
                                      'only new changes as you commit them.')
     parser.add_argument('-c', '--check', action='store_true',
                         help='Checks to see if all linting tools are in the ' +
                         'PATH. If some are missing, reports which ones.')
+    parser.add_argument('-b', '--budget', type=budget_seconds, metavar='SECONDS',
+                        help='Only lint the files that fit in about ' +
+                        'SECONDS seconds, checking the files most likely to ' +
+                        'introduce new warnings first. Files left ' +
+                        'unchecked are reported. Meant for manual runs ' +
+                        'before committing, since --finish can only check ' +
+                        'files that are still staged.')
+    parser.add_argument('-f', '--finish', action='store_true',
+                        help='Only check the staged files that a previous ' +
+                        'run with --budget did not get around to. Files ' +
+                        'that have been committed since are not checked.')
     args = parser.parse_args()
 
     missing_configurations = get_missing_configuration_files()
@@ -295,11 +503,42 @@ def main():
                          'files.\n')
         return 0
 
-    all_staged_files = build_file_list('ACMR')
+    # Files without any linters enabled for them need no checking, and would
+    # only skew the lint history used to prioritize files.
+    staged_files = build_file_list('ACMR')
+    all_staged_files = [f for f in staged_files if has_linters(f)]
+
+    if args.finish:
+        previously_unchecked = read_unchecked_files()
+        if not previously_unchecked:
+            print('No unchecked files left from a previous run.')
+            return 0
+        staged_set = set(staged_files)
+        lintable_set = set(all_staged_files)
+        for filename in previously_unchecked:
+            if filename not in staged_set:
+                sys.stderr.write('"' + filename + '" is no longer staged ' +
+                                 'and will not be checked.\n')
+            elif filename not in lintable_set:
+                sys.stderr.write('"' + filename + '" no longer has any ' +
+                                 'linters enabled and will not be ' +
+                                 'checked.\n')
+        all_staged_files = [f for f in previously_unchecked
+                            if f in lintable_set]
+
     if not all_staged_files:
         # No need to lint any files.
+        write_unchecked_files([])
         return 0
 
+    history = LintHistory.load()
+    budget = math.inf
+    if args.budget is not None:
+        budget = args.budget
+        all_staged_files = prioritize_files(all_staged_files,
+                                            build_changed_lines_dict(),
+                                            history)
+
     # Save any state related to merge conflicts because we will lose them
     # once we perform any git stashing.
     merge_msg, merge_hash = save_merge_state()
@@ -308,24 +547,40 @@ def main():
     subprocess.call(['git', 'stash', 'save', '--keep-index', '--quiet',
                      '"pre-commit hook unstaged changes"'])
 
+    # Lint the staged files, most important first when running with a time
+    # budget, as long as they fit in the budget.
+    changed_file_list = build_file_list('CM')
+    current_renamed_file_list = build_file_list('R')
+    current_lint_mapping, unchecked_files = \
+        lint_list_within_budget(all_staged_files, budget,
+                                set(changed_file_list +
+                                    current_renamed_file_list),
+                                history)
+
     # Build a dictionary containing the filenames of copied and modified
     # files mapped to the output obtained from linting them.
-    changed_file_list = build_file_list('CM')
-    current_modified_lint_mapping = lint_list(changed_file_list)
+    changed_file_list = [f for f in changed_file_list
+                         if f in current_lint_mapping]
+    current_modified_lint_mapping = {f: current_lint_mapping[f]
+                                     for f in changed_file_list}
 
     # Build a dictionary containing the filenames of added files mapped
     # to the output obtained from linting them.
-    added_file_list = build_file_list('A')
-    added_lint_mapping = lint_list(added_file_list)
+    added_lint_mapping = {f: current_lint_mapping[f]
+                          for f in build_file_list('A')
+                          if f in current_lint_mapping}
 
     # Build a dictionary containing the new filenames of renamed files
     # mapped to the output obtained from linting them.
-    current_renamed_file_list = build_file_list('R')
-    current_renamed_lint_mapping = lint_list(current_renamed_file_list)
+    current_renamed_lint_mapping = {f: current_lint_mapping[f]
+                                    for f in current_renamed_file_list
+                                    if f in current_lint_mapping}
 
     # We also need a list of the old filenames that the renamed files
     # have been derived from.
-    new_to_old_rename_mapping = build_rename_dict()
+    new_to_old_rename_mapping = {new: old for new, old
+                                 in build_rename_dict().items()
+                                 if new in current_lint_mapping}
 
     # Now, we'll roll back changes that *are* being committed as well to
     # get the baseline linting output.
@@ -373,7 +628,18 @@ def main():
 
     new_diff_lint_errors = detect_new_diff_lint_errors(log_output)
     any_new_errors = added_new_errors or new_diff_lint_errors
-    finalize_log_output(log_output, any_new_errors)
+
+    # Remember which files were left unchecked so `difflint --finish` can
+    # check them later, and how long linting took for future budgeted runs.
+    report_unchecked_files(unchecked_files, log_output)
+    write_unchecked_files(unchecked_files)
+    history.save()
+
+    # Keep the log if files were left unchecked, even without new errors,
+    # so that it records which ones. When finishing a run with a time budget,
+    # keep the errors it already reported.
+    finalize_log_output(log_output, any_new_errors or bool(unchecked_files),
+                        append=args.finish)
 
     # This is where we could accept or reject commits via return code.
     return 0
@@ -2,14 +2,16 @@
 
 import functools
 import json
-import os.path
 import pathlib
 import pep8
 from pkg_resources import resource_filename
+import posixpath
 import pyflakes.api
 import shutil
+import subprocess
 import sys
 
+from .linter_index import LinterIndex
 from .lint_output import LintOutput
 from .python_reporters import PEP8TerseReporter, PyFlakesTerseReporter
 from .utils import repo_root
@@ -28,26 +30,23 @@ def _get_enabled_linters_config_path():
         return custom_path
     return pathlib.Path(resource_filename(__name__, 'data/.difflintrc'))
 
-@functools.lru_cache()
-def _read_enabled_linters_config():
-    """Reads from the configuration file to determine which linters
-    should be used for which file extensions. This will first attempt
-    to read from a custom configuration file specific to the current
-    repository. If it cannot find one, it will fall back on the
-    default. If the custom file is not valid JSON, this will raise
-    an exception.
+def _read_enabled_linters_config(config_path):
+    """Reads from a configuration file to determine which linters
+    should be used for which file extensions. If the file is not valid
+    JSON, this will raise an exception.
 
-    Inputs: None
+    Inputs: A pathlib.Path object.
 
     Output: A dictionary of languages mapped to a dictionary of extensions 
-            and linters.
+            and linters, and optionally include and exclude globs.
 
     Example Output Format:
 
     {
         "javascript": {
             "extensions": ["js"],
-            "linters": ["jscs", "jshint"]
+            "linters": ["jscs", "jshint"],
+            "exclude": ["vendor/*", "*.min.js"]
         },
         "python": {
             "extensions": ["py", "pyw"],
@@ -55,18 +54,56 @@ def _read_enabled_linters_config():
         }
     }
     """
-    config_path = _get_enabled_linters_config_path()
-
     try:
         with config_path.open() as config:
             return json.load(config)
     except ValueError as ve:
-        sys.stderr.write("Failed to parse custom .difflintrc file. " +
+        sys.stderr.write("Failed to parse custom .difflintrc file " +
+                         str(config_path) + ". " +
                          "Make sure the file is valid JSON or remove " +
-                         "the file and fall back on the default " +
+                         "the file and fall back on the inherited " +
                          "configuration.\n")
         raise ve
 
+def _get_nested_config_dirs():
+    """Finds the subdirectories of the repository that contain their
+    own .difflintrc file, as known to git.
+
+    Inputs: None
+
+    Output: A list of directories relative to the root of the repository,
+            as strings using forward slashes.
+    """
+    git_ls_files_output = subprocess.check_output(
+        ['git', 'ls-files', '-z', '--cached', '--others',
+         '--exclude-standard', '--', '*/.difflintrc'],
+        cwd=str(repo_root()))
+    return [posixpath.dirname(f)
+            for f in git_ls_files_output.decode().split('\0') if f]
+
+@functools.lru_cache()
+def _get_linter_index():
+    """Reads every .difflintrc file in the repository and compiles them
+    into an index of which linters apply to which paths. The file at the
+    root of the repository, or the default one if there is none, applies
+    everywhere; the ones in subdirectories inherit from and override the
+    one in their nearest ancestor directory.
+
+    This value is cached, so the configuration is only read and compiled
+    once per run.
+
+    Inputs: None
+
+    Output: A LinterIndex object.
+    """
+    configs = {'': _read_enabled_linters_config(
+        _get_enabled_linters_config_path())}
+    for directory in _get_nested_config_dirs():
+        config_path = repo_root() / directory / '.difflintrc'
+        if config_path.is_file():
+            configs[directory] = _read_enabled_linters_config(config_path)
+    return LinterIndex(configs)
+
 def get_missing_configuration_files():
     """Check that all mandatory configuration files for difflint are
     in their expected locations.
@@ -95,15 +132,24 @@ def get_missing_linters():
 
             if any linters are not found. Otherwise returns an empty list.
     """
-    enabled_linters_dict = _read_enabled_linters_config()
     missing_linters = []
-    for language, language_dict in enabled_linters_dict.items():
-        for linter in language_dict['linters']:
-            if shutil.which(linter) is None:
-                missing_linters.append({'language': language,
-                                        'linter': linter})
+    for language, linter in _get_linter_index().enabled_linters():
+        if shutil.which(linter) is None:
+            missing_linters.append({'language': language,
+                                    'linter': linter})
     return missing_linters
 
+def has_linters(file_to_lint):
+    """Check whether any linters are enabled for a file.
+
+    Inputs: Path to a file, relative to the root of the repository, as a
+            string.
+
+    Output: True if linting the file would run at least one linter; False
+            otherwise.
+    """
+    return bool(_get_linter_index().linters_for(file_to_lint))
+
 def _lint_eslint(file_to_lint, lint_output):
     eslint = shutil.which('eslint')
     lint_output.run_command([eslint, file_to_lint, '--format',
@@ -143,25 +189,17 @@ def _lint_pyflakes(file_to_lint, lint_output):
     return lint_output
 
 def lint(file_to_lint):
-    """Perform linting on a file according to its extension.
+    """Perform linting on a file according to its extension and the
+    .difflintrc files in effect for its directory.
 
-    Inputs: Path to a file to lint, as a string.
+    Inputs: Path to a file to lint, relative to the root of the repository,
+            as a string.
 
     Output: A LintOutput object with linting results.
     """
-    root, ext = os.path.splitext(file_to_lint)
-
-    # Strip the leading period to match the format in the configuration file.
-    ext = ext[1:]
-
-    # This value is cached across function calls, so it is not expensive to
-    # continue reading this configuration for every file.
-    config = _read_enabled_linters_config()
-
-    linters_to_run = []
-    for language, language_dict in config.items():
-        if ext in language_dict['extensions']:
-            linters_to_run.extend(language_dict['linters'])
+    # This index is cached across function calls, so it is not expensive to
+    # continue resolving linters with it for every file.
+    linters_to_run = _get_linter_index().linters_for(file_to_lint)
 
     output = LintOutput()
 
@@ -0,0 +1,151 @@
+# Copyright 2015 Endless Mobile, Inc.
+
+import fnmatch
+import os.path
+import re
+
+
+class _LanguageRule(object):
+    """The effective settings of one language in one directory."""
+
+    def __init__(self, language, extensions, linters, include, exclude):
+        self.language = language
+        self.extensions = extensions
+        self.linters = linters
+        # Lists of compiled regular expressions, anchored to the directory of
+        # the configuration file that declared them. An include of None
+        # means that every path is included.
+        self.include = include
+        self.exclude = exclude
+
+    def override(self, language_dict, directory):
+        """Return a new rule with the settings from language_dict, as read
+        from the configuration file in directory, replacing these ones."""
+        include = self.include
+        if 'include' in language_dict:
+            include = _compile_globs(language_dict['include'], directory)
+        exclude = self.exclude
+        if 'exclude' in language_dict:
+            exclude = _compile_globs(language_dict['exclude'], directory)
+        return _LanguageRule(self.language,
+                             language_dict.get('extensions', self.extensions),
+                             language_dict.get('linters', self.linters),
+                             include, exclude)
+
+    def matches(self, path):
+        """Return whether the include and exclude globs select the path."""
+        if self.include is not None and \
+                not any(r.match(path) for r in self.include):
+            return False
+        return not any(r.match(path) for r in self.exclude)
+
+
+class _DirectoryNode(object):
+    """A directory in the trie, holding the rules in effect there."""
+
+    def __init__(self):
+        self.children = {}
+        self.config = None
+        self.rules = {}
+        self.rules_by_extension = {}
+
+
+def _compile_globs(globs, directory):
+    prefix = re.escape(directory + '/') if directory else ''
+    return [re.compile(prefix + fnmatch.translate(g)) for g in globs]
+
+
+def _split_directory(directory):
+    return [part for part in directory.split('/') if part not in ('', '.')]
+
+
+class LinterIndex(object):
+    """Resolve which linters apply to a path, given a configuration file at
+    the root of the repository and any number of configuration files in its
+    subdirectories.
+
+    Every configuration file inherits the languages of the configuration
+    file in the nearest ancestor directory. Settings given for a language
+    override the inherited ones key by key. Besides "extensions" and
+    "linters", a language may have "include" and "exclude" lists of globs,
+    matched against paths relative to the directory of the configuration
+    file that declared them.
+
+    The configuration files are compiled into a trie of directories once,
+    so resolving a path only needs to walk down its directories and look up
+    its extension.
+    """
+
+    def __init__(self, configs):
+        """Inputs: configs: A dictionary mapping directories, as paths
+                   relative to the root of the repository using forward
+                   slashes, to the parsed contents of the configuration file
+                   in that directory. The root directory is ''.
+        """
+        self._root = _DirectoryNode()
+        for directory, config in configs.items():
+            node = self._root
+            for part in _split_directory(directory):
+                node = node.children.setdefault(part, _DirectoryNode())
+            node.config = config
+        self._compile(self._root, '', {})
+
+    def _compile(self, node, directory, inherited_rules):
+        rules = inherited_rules
+        if node.config is not None:
+            rules = dict(inherited_rules)
+            for language, language_dict in node.config.items():
+                rule = rules.get(language,
+                                 _LanguageRule(language, [], [], None, []))
+                rules[language] = rule.override(language_dict, directory)
+        node.rules = rules
+        for rule in rules.values():
+            for ext in rule.extensions:
+                node.rules_by_extension.setdefault(ext, []).append(rule)
+        for name, child in node.children.items():
+            child_directory = directory + '/' + name if directory else name
+            self._compile(child, child_directory, rules)
+
+    def linters_for(self, path):
+        """Return the linters that should be run on a file.
+
+        Inputs: Path of the file relative to the root of the repository, as
+                a string.
+
+        Output: A list of linter names, in the order they were configured.
+        """
+        path = path.replace(os.sep, '/')
+        parts = path.split('/')
+        node = self._root
+        for part in parts[:-1]:
+            child = node.children.get(part)
+            if child is None:
+                break
+            node = child
+
+        # Strip the leading period to match the format in the configuration
+        # file.
+        ext = os.path.splitext(parts[-1])[1][1:]
+
+        linters = []
+        for rule in node.rules_by_extension.get(ext, []):
+            if rule.matches(path):
+                linters.extend(rule.linters)
+        return linters
+
+    def enabled_linters(self):
+        """Return every linter enabled for any language in any directory.
+
+        Output: A list of (language, linter) tuples containing no
+                duplicates.
+        """
+        enabled = []
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            for language, rule in node.rules.items():
+                for linter in rule.linters:
+                    if (language, linter) not in enabled:
+                        enabled.append((language, linter))
+            nodes.extend(node.children.values())
+        return enabled